@@ -3,6 +3,6 @@
 
 """
 
-from .instruments import EqOption, FutOption, FXOption, ComOption
+from .instruments import EqOption, FutOption, FXOption, ComOption, OptionBook
 from .optionstrategies import OptionStr1Udl, StdStrategies
 from .plotting import Plotting
\ No newline at end of file
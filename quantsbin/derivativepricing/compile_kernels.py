@@ -0,0 +1,39 @@
+"""
+    developed by Quantsbin - Jun'18
+
+    Ahead of time compilation of the numba kernels into the quantsbin_kernels extension module,
+    so that no JIT compilation happens at runtime. Built by setup.py when numba is installed or manually with
+        python -m quantsbin.derivativepricing.compile_kernels
+
+    The extension targets a generic cpu so that built wheels stay portable. Set the environment variable
+    QUANTSBIN_NATIVE_KERNELS=1 when building to tune the kernels for the building machine's cpu instead.
+"""
+
+import os
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
+
+from numba.pycc import CC
+
+# kernels.py is loaded by path so that setup.py can build the extension without importing the quantsbin package.
+# It is registered under its package name as numba's on disk cache refers to the kernels by module name.
+_spec = spec_from_file_location('quantsbin.derivativepricing.kernels',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kernels.py'))
+kernels = sys.modules.get(_spec.name)
+if kernels is None:
+    kernels = module_from_spec(_spec)
+    sys.modules[_spec.name] = kernels
+    _spec.loader.exec_module(kernels)
+
+cc = CC('quantsbin_kernels')
+if os.environ.get('QUANTSBIN_NATIVE_KERNELS'):
+    cc.target_cpu = 'host'
+
+cc.export('bsm_premium', 'f8(i8, f8, f8, f8, f8, f8, f8, f8)')(kernels.bsm_premium.py_func)
+cc.export('payoff_vec', 'f8[:](i8, f8[:], f8)')(kernels.payoff_vec.py_func)
+cc.export('exercise_update', 'void(i8, f8[:], f8, f8[:], f8[:])')(kernels.exercise_update.py_func)
+cc.export('binomial_backward', 'f8(i8, f8, b1, f8, f8, f8, f8, f8[:], b1, f8)')(kernels.binomial_backward.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
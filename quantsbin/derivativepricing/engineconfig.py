@@ -3,7 +3,7 @@
 
 """
 
-from .namesnmapper import MODEL_MAPPER, IV_MODELS, ANALYTICAL_GREEKS, OBJECT_MODEL
+from .namesnmapper import MODEL_MAPPER, IV_MODELS, ANALYTICAL_GREEKS, OBJECT_MODEL_FLAT
 from .numericalgreeks import NumericalGreeks
 
 
@@ -34,7 +34,7 @@ class PricingEngine:
             Args required:
                 self.model: property defined in engineconfig module under Pricing Engine class
         """
-        assert self._model in OBJECT_MODEL[self.instrument.undl][self.instrument.expiry_type], \
+        assert self._model in OBJECT_MODEL_FLAT[(self.instrument.undl, self.instrument.expiry_type)], \
             "Model not valid please check available models using option.list_models()"
         return True
 
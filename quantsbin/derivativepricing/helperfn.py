@@ -4,8 +4,19 @@
 """
 
 from datetime import datetime as dt
+from functools import lru_cache
 from math import e
 
+import numpy as np
+from scipy.special import ndtr
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date):
+    if len(date) == 8 and date.isdigit():
+        return dt(int(date[:4]), int(date[4:6]), int(date[6:8]))
+    return dt.strptime(date, '%Y%m%d')
+
 
 def dividend_processor(div_list, pricing_date, expiry_date):
     div_processed = []
@@ -18,6 +29,13 @@ def dividend_processor(div_list, pricing_date, expiry_date):
     return div_processed
 
 
+def bsm_premium(flag, strike, maturity, discount_factor, adj_discount_factor, carry, spot0, volatility):
+    vol_sqrt_maturity = volatility * np.sqrt(maturity)
+    d1 = (np.log(spot0 / strike) + (carry + 0.5 * volatility * volatility) * maturity) / vol_sqrt_maturity
+    d2 = d1 - vol_sqrt_maturity
+    return flag * (spot0 * adj_discount_factor * ndtr(flag * d1) - strike * discount_factor * ndtr(flag * d2))
+
+
 def pv_div(div_processed, time_point, disc_rate):
     pv_div_amount = 0
     if len(div_processed) == 0: return pv_div_amount
@@ -4,10 +4,30 @@
 """
 
 from abc import ABCMeta, abstractmethod
-from datetime import datetime
+from math import e
+from typing import Optional, Union
+import numpy as np
 
 from .engineconfig import PricingEngine
-from .namesnmapper import VanillaOptionType, ExpiryType, DEFAULT_MODEL, UdlType, OBJECT_MODEL, DerivativeType
+from .helperfn import parse_date, bsm_premium
+from .namesnmapper import VanillaOptionType, ExpiryType, DEFAULT_MODEL_FLAT, UdlType, OBJECT_MODEL_FLAT, \
+    DerivativeType
+
+Spot = Union[float, np.ndarray]
+
+_MODELS_STR = {key: ", ".join(models) for key, models in OBJECT_MODEL_FLAT.items()}
+
+try:
+    from .quantsbin_kernels import payoff_vec as _payoff_vec, exercise_update as _exercise_update, \
+        bsm_premium as _bsm_premium
+except ImportError:
+    try:
+        from .kernels import payoff_vec as _payoff_vec, exercise_update as _exercise_update, \
+            bsm_premium as _bsm_premium
+    except ImportError:
+        _payoff_vec = None
+        _exercise_update = None
+        _bsm_premium = bsm_premium
 
 
 class Instrument(metaclass=ABCMeta):
@@ -19,8 +39,10 @@ class Instrument(metaclass=ABCMeta):
         engine => attach the instrument with the pricing model and market data.
     """
 
+    __slots__ = ()
+
     @abstractmethod
-    def payoff(self):
+    def payoff(self, spot0: Spot) -> Spot:
         pass
 
     def engine(self, **kwargs):
@@ -32,12 +54,15 @@ class Instrument(metaclass=ABCMeta):
                 For arguments required and method available for each model check\
                 help(.derivativepricing.pricingmodels.<model name>)
         """
-        if not kwargs['model']:
-            kwargs['model'] = DEFAULT_MODEL[self.undl][self.derivative_type][self.expiry_type]
-        return PricingEngine(self, **kwargs)
+        model = kwargs.pop('model', None) or self._default_model
+        return PricingEngine(self, model, **kwargs)
+
+    @property
+    def _models_tuple(self):
+        return OBJECT_MODEL_FLAT[(self.undl, self.expiry_type)]
 
     def list_models(self):
-        return ", ".join(OBJECT_MODEL[self.undl][self.expiry_type])
+        return _MODELS_STR[(self.undl, self.expiry_type)]
 
 
 class VanillaOption(Instrument):
@@ -51,23 +76,30 @@ class VanillaOption(Instrument):
         engine(model, **kwargs)
             Binds the inout parameter with pricing models.
             To check valid models for underlying use .models()
+
+        american_step(spot_layer, continuation_values, out)
+            Early exercise check over one time layer of a lattice.
+
+        compile_pricer(pricing_date, rf_rate, cnv_yield, cost_yield)
+            Returns a function pricer(spot0, volatility) with all other inputs fixed.
     """
 
-    def __init__(self, option_type, expiry_type, strike, expiry_date, derivative_type):
+    __slots__ = ('option_type', 'expiry_type', 'strike', 'expiry_date', 'derivative_type',
+                 '_option_type_flag', '_default_model')
+
+    undl = None  # type: Optional[str]
+
+    def __init__(self, option_type, expiry_type, strike: Optional[float], expiry_date, derivative_type) -> None:
         self.option_type = option_type or VanillaOptionType.CALL.value
         self.expiry_type = expiry_type or ExpiryType.EUROPEAN.value
-        self.strike = strike
-        self.expiry_date = datetime.strptime(expiry_date, '%Y%m%d')
+        self.strike = strike  # type: Optional[float]
+        self.expiry_date = parse_date(expiry_date)
         self.derivative_type = derivative_type or DerivativeType.VANILLA_OPTION.value
+        self._option_type_flag = 1 if self.option_type == VanillaOptionType.CALL.value else -1  # type: int
+        self._default_model = DEFAULT_MODEL_FLAT[(self.undl, self.derivative_type, self.expiry_type)] \
+            if self.undl is not None else None
 
-    @property
-    def _option_type_flag(self):
-        if self.option_type == VanillaOptionType.CALL.value:
-            return 1
-        else:
-            return -1
-
-    def payoff(self, spot0=None):
+    def payoff(self, spot0: Spot) -> Spot:
         """
         Calculates the payoff of option
 
@@ -75,10 +107,78 @@ class VanillaOption(Instrument):
              Payoff(Call) = max(S-K,0)
              Payoff(Put) = max(K-S,0)
          Args required:
-             spot0: Value of underlying e.g. 110
+             spot0: Value of underlying e.g. 110 or numpy array of values e.g. simulated terminal prices.
+                    float32 arrays are kept in float32 (about 7 significant digits) to halve memory traffic
+                    for large simulations.
         """
+        if self.strike is None:
+            raise ValueError("Strike is required to calculate payoff")
+        if isinstance(spot0, np.ndarray):
+            if spot0.dtype == np.float32:
+                return np.maximum(np.int8(self._option_type_flag) * (spot0 - np.float32(self.strike)),
+                                  np.float32(0.0))
+            if _payoff_vec is not None and spot0.dtype == np.float64:
+                if spot0.ndim == 1:
+                    return _payoff_vec(self._option_type_flag, spot0, self.strike)
+                if spot0.flags.c_contiguous:
+                    return _payoff_vec(self._option_type_flag, spot0.reshape(-1), self.strike).reshape(spot0.shape)
+            return np.maximum(self._option_type_flag * (spot0 - self.strike), 0.0)
         return max(self._option_type_flag * (spot0 - self.strike), 0.0)
 
+    def american_step(self, spot_layer, continuation_values, out=None):
+        """
+        Node values of one lattice time layer for early exercise i.e. max(intrinsic value, continuation value)
+
+         Args required:
+             spot_layer: (numpy array) Underlying value at each node of the layer
+             continuation_values: (numpy array) Discounted expected value of holding at each node of the layer
+             out: (numpy array) Array to write node values in, can be continuation_values itself (optional)
+        """
+        if out is None:
+            out = np.empty(spot_layer.shape[0])
+        if not spot_layer.shape == continuation_values.shape == out.shape:
+            raise ValueError("spot_layer, continuation_values and out should have the same shape")
+        if _exercise_update is not None and spot_layer.ndim == 1 and \
+                spot_layer.dtype == continuation_values.dtype == out.dtype == np.float64:
+            _exercise_update(self._option_type_flag, spot_layer, self.strike, continuation_values, out)
+        else:
+            np.maximum(self._option_type_flag * (spot_layer - self.strike), continuation_values, out=out)
+        return out
+
+    def compile_pricer(self, pricing_date, rf_rate=0, cnv_yield=0, cost_yield=0):
+        """
+        Builds Black Scholes Merton framework pricer with everything except spot and volatility fixed.
+        Useful for repeated valuation e.g. volatility calibration. Pricer calls the compiled Black Scholes
+        kernel when numba is installed.
+
+         Args required:
+             pricing_date: (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210"
+             rf_rate: (Float < 1) risk free continuously compounded discount rate e.g. 5% as 0.05
+             cnv_yield: (Float < 1) dividend/convenience/foreign rate continuously compounded e.g. 1% as 0.01
+                        (ignored for FutOption where it is equal to rf_rate)
+             cost_yield: (Float < 1) Cost yield continuously compounded e.g. 2% as 0.02
+         Returns:
+             pricer(spot0, volatility) -> premium
+        """
+        assert self.expiry_type == ExpiryType.EUROPEAN.value, "Pricer can only be compiled for European expiry"
+        _pricing_date = parse_date(pricing_date)
+        if _pricing_date >= self.expiry_date:
+            raise Exception("Pricing date should be less than expiry of instrument")
+        if self.undl == UdlType.FUTURES.value:
+            cnv_yield = rf_rate
+        maturity = (self.expiry_date - _pricing_date).days / 365.0
+        strike = float(self.strike)
+        flag = self._option_type_flag
+        carry = rf_rate - cnv_yield + cost_yield
+        discount_factor = e ** (-1 * rf_rate * maturity)
+        adj_discount_factor = e ** (-1 * (cnv_yield - cost_yield) * maturity)
+
+        def pricer(spot0, volatility):
+            return _bsm_premium(flag, strike, maturity, discount_factor, adj_discount_factor, carry,
+                                spot0, volatility)
+
+        return pricer
+
 
 class EqOption(VanillaOption):
     """
@@ -92,14 +192,17 @@ class EqOption(VanillaOption):
             derivative_type: Default value as "Vanilla Option".
     """
 
+    __slots__ = ()
+    undl = UdlType.STOCK.value
+
     def __init__(self, option_type=VanillaOptionType.CALL.value, expiry_type=ExpiryType.EUROPEAN.value,
                  strike=None, expiry_date=None, derivative_type=None
                  ):
         super().__init__(option_type, expiry_type, strike, expiry_date, derivative_type)
-        self.undl = UdlType.STOCK.value
 
     def engine(self, model=None, spot0=None, rf_rate=0, yield_div=0, div_list=None, volatility=None,
-               pricing_date=None, **kwargs):
+               pricing_date=None, no_of_path=None, no_of_steps=None, mc_method=None, seed=None,
+               antithetic=False, prune_tolerance=None, **kwargs):
         """
         Binds pricing model class and market data to the object
             Args required:
@@ -126,9 +229,13 @@ class EqOption(VanillaOption):
                         no_of_steps = (Integer). Number of steps (nodes) for the premium calculation.
                                        Maximum value accepted is 100. This limit will be increased
                                        in future release.
+                        prune_tolerance = (Float). Lattice nodes whose value stays within this of zero are
+                                          skipped e.g. 1e-12. Default None (no pruning).
                 """
-        return super().engine(model=model, spot0=spot0, rf_rate=rf_rate, cnv_yield=yield_div, pv_cnv=0,
-                              div_list=div_list, volatility=volatility, pricing_date=pricing_date, **kwargs)
+        return PricingEngine(self, model or self._default_model, spot0=spot0, rf_rate=rf_rate, cnv_yield=yield_div,
+                             pv_cnv=0, div_list=div_list, volatility=volatility, pricing_date=pricing_date,
+                             no_of_path=no_of_path, no_of_steps=no_of_steps, mc_method=mc_method, seed=seed,
+                             antithetic=antithetic, prune_tolerance=prune_tolerance, **kwargs)
 
 
 class FutOption(VanillaOption):
@@ -142,13 +249,17 @@ class FutOption(VanillaOption):
             expiry_date: (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210".
     """
 
+    __slots__ = ()
+    undl = UdlType.FUTURES.value
+
     def __init__(self, option_type=VanillaOptionType.CALL.value, expiry_type=ExpiryType.EUROPEAN.value,
                  strike=None, expiry_date=None, derivative_type=None
                  ):
         super().__init__(option_type, expiry_type, strike, expiry_date, derivative_type)
-        self.undl = UdlType.FUTURES.value
 
-    def engine(self, model=None, fwd0=None, rf_rate=0, volatility=None, pricing_date=None, **kwargs):
+    def engine(self, model=None, fwd0=None, rf_rate=0, volatility=None, pricing_date=None, no_of_path=None,
+               no_of_steps=None, mc_method=None, seed=None, antithetic=False, prune_tolerance=None,
+               **kwargs):
         """
         Binds pricing model class and market data to the object
             Args required:
@@ -172,9 +283,13 @@ class FutOption(VanillaOption):
                         no_of_steps = (Integer). Number of steps (nodes) for the premium calculation.
                                        Maximum value accepted is 100. This limit will be increased
                                        in future release.
+                        prune_tolerance = (Float). Lattice nodes whose value stays within this of zero are
+                                          skipped e.g. 1e-12. Default None (no pruning).
         """
-        return super().engine(model=model, spot0=fwd0, rf_rate=rf_rate, cnv_yield=rf_rate,
-                              volatility=volatility, pricing_date=pricing_date, **kwargs)
+        return PricingEngine(self, model or self._default_model, spot0=fwd0, rf_rate=rf_rate, cnv_yield=rf_rate,
+                             volatility=volatility, pricing_date=pricing_date,
+                             no_of_path=no_of_path, no_of_steps=no_of_steps, mc_method=mc_method, seed=seed,
+                             antithetic=antithetic, prune_tolerance=prune_tolerance, **kwargs)
 
 
 class FXOption(VanillaOption):
@@ -188,14 +303,17 @@ class FXOption(VanillaOption):
             expiry_date: (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210".
     """
 
+    __slots__ = ()
+    undl = UdlType.FX.value
+
     def __init__(self, option_type=VanillaOptionType.CALL.value, expiry_type=ExpiryType.EUROPEAN.value,
                  strike=None, expiry_date=None, derivative_type=None
                  ):
         super().__init__(option_type, expiry_type, strike, expiry_date, derivative_type)
-        self.undl = UdlType.FX.value
 
     def engine(self, model=None, spot0=None, rf_rate_local=0, rf_rate_foreign=0, volatility=None,
-               pricing_date=None, **kwargs):
+               pricing_date=None, no_of_path=None, no_of_steps=None, mc_method=None, seed=None,
+               antithetic=False, prune_tolerance=None, **kwargs):
         """
         Binds pricing model class and market data to the object
             Args required:
@@ -222,9 +340,13 @@ class FXOption(VanillaOption):
                         no_of_steps = (Integer). Number of steps (nodes) for the premium calculation.
                                        Maximum value accepted is 100. This limit will be increased
                                        in future release.
+                        prune_tolerance = (Float). Lattice nodes whose value stays within this of zero are
+                                          skipped e.g. 1e-12. Default None (no pruning).
         """
-        return super().engine(model=model, spot0=spot0, rf_rate=rf_rate_local, cnv_yield=rf_rate_foreign,
-                              volatility=volatility, pricing_date=pricing_date, **kwargs)
+        return PricingEngine(self, model or self._default_model, spot0=spot0, rf_rate=rf_rate_local,
+                             cnv_yield=rf_rate_foreign, volatility=volatility, pricing_date=pricing_date,
+                             no_of_path=no_of_path, no_of_steps=no_of_steps, mc_method=mc_method, seed=seed,
+                             antithetic=antithetic, prune_tolerance=prune_tolerance, **kwargs)
 
 
 class ComOption(VanillaOption):
@@ -237,14 +359,18 @@ class ComOption(VanillaOption):
             strike: (Float in same unit as underlying price) e.g. 110.0
             expiry_date: (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210".
     """
+
+    __slots__ = ()
+    undl = UdlType.COMMODITY.value
+
     def __init__(self, option_type=VanillaOptionType.CALL.value, expiry_type=ExpiryType.EUROPEAN.value,
                  strike=None, expiry_date=None, derivative_type=None
                  ):
         super().__init__(option_type, expiry_type, strike, expiry_date, derivative_type)
-        self.undl = UdlType.COMMODITY.value
 
     def engine(self, model=None, spot0=None, rf_rate=0, cnv_yield=0, cost_yield=0, volatility=None,
-               pricing_date=None, **kwargs):
+               pricing_date=None, no_of_path=None, no_of_steps=None, mc_method=None, seed=None,
+               antithetic=False, prune_tolerance=None, **kwargs):
         """
         Binds pricing model class and market data to the object
             Args required:
@@ -270,6 +396,95 @@ class ComOption(VanillaOption):
                         no_of_steps = (Integer). Number of steps (nodes) for the premium calculation.
                                        Maximum value accepted is 100. This limit will be increased
                                        in future release.
+                        prune_tolerance = (Float). Lattice nodes whose value stays within this of zero are
+                                          skipped e.g. 1e-12. Default None (no pruning).
+        """
+        return PricingEngine(self, model or self._default_model, spot0=spot0, rf_rate=rf_rate, cnv_yield=cnv_yield,
+                             cost_yield=cost_yield, volatility=volatility, pricing_date=pricing_date,
+                             no_of_path=no_of_path, no_of_steps=no_of_steps, mc_method=mc_method, seed=seed,
+                             antithetic=antithetic, prune_tolerance=prune_tolerance, **kwargs)
+
+
+class OptionBook:
+    """
+    Book of vanilla options stored as parallel numpy arrays for batch calculations.
+
+    Args required:
+            strikes: (List/array of floats) strike of each option e.g. [100.0, 110.0]
+            flags: (List/array of ints) 1 for Call and -1 for Put e.g. [1, -1]
+            expiries: (List of dates in string format "YYYYMMDD" or datetime) e.g. ["20181210", "20181210"]
+            undls: (List of underlying types) e.g. ["Stock", "Futures"] (default "Stock" for all options)
+            expiry_types: (List of expiry types) e.g. ["European", "American"] (default "European" for all options)
+            dtype: numpy float type for strikes and spots in payoff (default np.float32, about 7 significant
+                   digits, use np.float64 for full precision). valuation always uses float64 strikes.
+
+    Methods:
+        payoff(spots) ->
+            Payoff of every option in the book for every spot. For M spots and K options returns array of shape (M, K)
+
+        valuation(spot0, volatility, pricing_date, rf_rate, cnv_yield, cost_yield) ->
+            Premium of every option in the book with European expiry under the BSM framework (BSM/B76/GK)
+
+        from_instruments(instruments) ->
+            Builds the book from a list of VanillaOption objects
+    """
+
+    def __init__(self, strikes, flags, expiries, undls=None, expiry_types=None, dtype=np.float32):
+        self._strikes_f8 = np.asarray(strikes, dtype=np.float64)
+        self.strikes = self._strikes_f8.astype(dtype)
+        self.flags = np.asarray(flags, dtype=np.int8)
+        self.expiries = np.array([parse_date(expiry) if isinstance(expiry, str) else expiry for expiry in expiries],
+                                 dtype='datetime64[D]')
+        if undls is None:
+            undls = [UdlType.STOCK.value] * self.strikes.shape[0]
+        self.undls = np.array(undls)
+        if expiry_types is None:
+            expiry_types = [ExpiryType.EUROPEAN.value] * self.strikes.shape[0]
+        self.expiry_types = np.array(expiry_types)
+        if not (self.strikes.shape == self.flags.shape == self.expiries.shape == self.undls.shape
+                == self.expiry_types.shape) or self.strikes.ndim != 1:
+            raise ValueError("strikes, flags, expiries, undls and expiry_types should be 1-D with the same length")
+
+    @classmethod
+    def from_instruments(cls, instruments, dtype=np.float32):
+        return cls([option.strike for option in instruments],
+                   [option._option_type_flag for option in instruments],
+                   [option.expiry_date for option in instruments],
+                   [option.undl for option in instruments],
+                   [option.expiry_type for option in instruments], dtype=dtype)
+
+    def __len__(self):
+        return self.strikes.shape[0]
+
+    def payoff(self, spots):
+        """
+        Calculates the payoff of all options in the book
+
+         Args required:
+             spots: Value of underlying e.g. 110 or list/array of values e.g. [100, 110, 120]
+        """
+        spots = np.asarray(spots, dtype=self.strikes.dtype)
+        return np.maximum(self.flags * (spots[..., None] - self.strikes), self.strikes.dtype.type(0.0))
+
+    def valuation(self, spot0, volatility, pricing_date, rf_rate=0, cnv_yield=0, cost_yield=0):
+        """
+        Calculates the premium of all options in the book, all of which should have European expiry
+
+         Args required:
+             spot0: Value of underlying (futures price for Futures) e.g. 110 or array with value for each option
+             volatility: (Float < 1) e.g. 0.25 or array with value for each option
+             pricing_date: (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210"
+             rf_rate: (Float < 1) risk free continuously compounded discount rate e.g. 5% as 0.05
+             cnv_yield: (Float < 1) dividend/convenience/foreign rate continuously compounded e.g. 1% as 0.01
+                        (ignored for Futures where it is equal to rf_rate)
+             cost_yield: (Float < 1) Cost yield continuously compounded e.g. 2% as 0.02
         """
-        return super().engine(model=model, spot0=spot0, rf_rate=rf_rate, cnv_yield=cnv_yield, cost_yield=cost_yield,
-                              volatility=volatility, pricing_date=pricing_date, **kwargs)
+        assert np.all(self.expiry_types == ExpiryType.EUROPEAN.value), \
+            "Book can only be valued when all options have European expiry"
+        maturity = (self.expiries - np.datetime64(parse_date(pricing_date), 'D')).astype(np.float64) / 365.0
+        if np.any(maturity <= 0):
+            raise Exception("Pricing date should be less than expiry of instrument")
+        cnv_yield = np.where(self.undls == UdlType.FUTURES.value, rf_rate, cnv_yield)
+        return bsm_premium(self.flags, self._strikes_f8, maturity, np.exp(-1 * rf_rate * maturity),
+                           np.exp(-1 * (cnv_yield - cost_yield) * maturity), rf_rate - cnv_yield + cost_yield,
+                           np.asarray(spot0, dtype=np.float64), np.asarray(volatility, dtype=np.float64))
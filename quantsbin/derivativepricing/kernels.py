@@ -0,0 +1,95 @@
+"""
+    developed by Quantsbin - Jun'18
+
+"""
+
+from math import ceil, erfc, floor, log, sqrt
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def norm_cdf(x):
+    return 0.5 * erfc(-x / sqrt(2.0))
+
+
+@njit(cache=True, fastmath=True)
+def bsm_premium(flag, strike, maturity, discount_factor, adj_discount_factor, carry, spot0, volatility):
+    vol_sqrt_maturity = volatility * sqrt(maturity)
+    d1 = (log(spot0 / strike) + (carry + 0.5 * volatility * volatility) * maturity) / vol_sqrt_maturity
+    d2 = d1 - vol_sqrt_maturity
+    return flag * (spot0 * adj_discount_factor * norm_cdf(flag * d1)
+                   - strike * discount_factor * norm_cdf(flag * d2))
+
+
+@njit(cache=True, fastmath=True)
+def payoff(flag, spot, strike):
+    intrinsic = flag * (spot - strike)
+    return 0.5 * (intrinsic + abs(intrinsic))
+
+
+# Serial on purpose: these loops are memory bound and numba's parallel threading layer hangs interpreter exit
+# once optionstrategies forks its multiprocessing pool.
+@njit(cache=True, fastmath=True)
+def payoff_vec(flag, spot, strike):
+    out = np.empty(spot.shape[0])
+    for i in range(spot.shape[0]):
+        out[i] = payoff(flag, spot[i], strike)
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def exercise_update(flag, spot, strike, continuation, out):
+    for i in range(spot.shape[0]):
+        intrinsic = flag * (spot[i] - strike)
+        out[i] = intrinsic if intrinsic > continuation[i] else continuation[i]
+
+
+@njit(cache=True)
+def binomial_backward(flag, strike, is_american, spot_update, up_mult, up_prob, step_discount_fact,
+                      step_pv_div, prune, prune_tolerance):
+    no_of_steps = step_pv_div.shape[0] - 1
+    node_value = np.empty(no_of_steps + 1)
+    lo, hi = no_of_steps + 1, -1
+    for no_up in range(no_of_steps + 1):
+        spot = spot_update * (up_mult ** (2 * no_up - no_of_steps)) + step_pv_div[no_of_steps]
+        node_value[no_up] = max(flag * (spot - strike), 0.0)
+        if not prune or node_value[no_up] > prune_tolerance:
+            lo = min(lo, no_up)
+            hi = no_up
+        else:
+            node_value[no_up] = 0.0
+    log_up_mult = log(up_mult)
+    start, end = 0, no_of_steps
+    for step_no in range(no_of_steps - 1, -1, -1):
+        # With prune set, node values within prune_tolerance of zero are set to zero and a node whose both
+        # children are zero stays zero unless early exercise is in the money, so it is skipped. Values are
+        # monotonic in no_up, hence the nodes left to calculate form one contiguous range.
+        start, end = max(lo - 1, 0), min(hi, step_no)
+        if is_american:
+            strike_adj = strike - step_pv_div[step_no]
+            if strike_adj <= 0 or spot_update <= 0:
+                itm_lo, itm_hi = 0, step_no
+            else:
+                threshold = 0.5 * (log(strike_adj / spot_update) / log_up_mult + step_no)
+                if flag == 1:
+                    itm_lo, itm_hi = max(int(floor(threshold)), 0), step_no
+                else:
+                    itm_lo, itm_hi = 0, min(int(ceil(threshold)), step_no)
+            if itm_lo <= itm_hi:
+                start, end = min(start, itm_lo), max(end, itm_hi)
+        lo, hi = step_no + 1, -1
+        for no_up in range(start, end + 1):
+            pv = ((up_prob * node_value[no_up + 1]) + ((1 - up_prob) * node_value[no_up])) * step_discount_fact
+            if is_american:
+                spot = spot_update * (up_mult ** (2 * no_up - step_no)) + step_pv_div[step_no]
+                intrinsic = flag * (spot - strike)
+                if intrinsic > pv:
+                    pv = intrinsic
+            if not prune or pv > prune_tolerance:
+                lo = min(lo, no_up)
+                hi = no_up
+            else:
+                pv = 0.0
+            node_value[no_up] = pv
+    return node_value[0]
@@ -104,6 +104,14 @@ DEFAULT_MODEL = {
          }
     }
 
+OBJECT_MODEL_FLAT = {(undl, expiry_type): tuple(models)
+                     for undl, expiry_models in OBJECT_MODEL.items() for expiry_type, models in expiry_models.items()}
+
+DEFAULT_MODEL_FLAT = {(undl, derivative_type, expiry_type): model
+                      for undl, derivative_models in DEFAULT_MODEL.items()
+                      for derivative_type, expiry_models in derivative_models.items()
+                      for expiry_type, model in expiry_models.items()}
+
 IV_MODELS = [PricingModel.BLACKSCHOLESMERTON.value, PricingModel.BLACK76.value, PricingModel.GK.value]
 
 ANALYTICAL_GREEKS = [PricingModel.BLACKSCHOLESMERTON.value, PricingModel.BLACK76.value, PricingModel.GK.value]
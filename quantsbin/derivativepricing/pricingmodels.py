@@ -16,6 +16,14 @@ from .namesnmapper import RiskParameter, VanillaOptionType, ExpiryType, UdlType
 from ..montecarlo.namesnmapper import StimulationType, mc_methd_mapper, ProcessNames
 from .helperfn import *
 
+try:
+    from .quantsbin_kernels import binomial_backward as _binomial_backward
+except ImportError:
+    try:
+        from .kernels import binomial_backward as _binomial_backward
+    except ImportError:
+        _binomial_backward = None
+
 
 class Model(metaclass=ABCMeta):
     """
@@ -343,8 +351,7 @@ class MonteCarloGBM(Model):
         return obj_stimulation.stimulation()
 
     def option_payoff(self, stimulated_price):
-        temp_zeros = np.zeros_like(stimulated_price)
-        return np.maximum(self.option_flag * (stimulated_price - self.instrument.strike), temp_zeros)
+        return self.instrument.payoff(stimulated_price)
 
     def LSM_model(self):
         _s_stimulated = self.stimulation_method()
@@ -396,11 +403,13 @@ class BinomialModel(Model):
         pricing_date = (Date in string format "YYYYMMDD") e.g. 10 Dec 2018 as "20181210"
             no_of_steps = (Integer). Number of steps (nodes) for the premium calculation e.g. 100
         div_list = (List). list of tuples with Ex-Dates and Dividend amounts. e.g. [('20180625',0.2),('20180727',0.6)]
+        prune_tolerance = (Float). Nodes whose value stays within this of zero are skipped e.g. 1e-12.
+                          None disables pruning. Used when numba is installed.
 
     """
 
     def __init__(self, instrument, spot0=None, rf_rate=0, cnv_yield=0, cost_yield=0,
-                 volatility=None, pricing_date=None, no_of_steps=None, div_list=None, **kwargs):
+                 volatility=None, pricing_date=None, no_of_steps=None, div_list=None, prune_tolerance=None, **kwargs):
         self.instrument = instrument
         self.spot0 = spot0 or 0.0001
         self.rf_rate = rf_rate or 0
@@ -410,7 +419,7 @@ class BinomialModel(Model):
         self._pricing_date = dt.strptime(pricing_date, '%Y%m%d')
         self.no_of_steps = no_of_steps or 100
         self.div_list = div_list
-        self.cache_node = {}
+        self.prune_tolerance = prune_tolerance
 
     @property
     def drift(self):
@@ -440,38 +449,29 @@ class BinomialModel(Model):
     def step_discount_fact(self):
         return e**(-1*self.rf_rate * self.t_delta)
 
-    def node_value_store(self, pv, intrinsic_value):
-        if self.instrument.expiry_type == ExpiryType.AMERICAN.value:
-            return max(pv, intrinsic_value)
-        else:
-            return pv
-
-    def intrinsic_value(self, _spot):
-        return max(self.option_flag * (_spot - self.instrument.strike), 0.0)
-
     def calc_spot(self, step_no, no_up):
         return self.spot_update * (self.up_mult**(2*no_up - step_no)) + \
                pv_div(self.div_processed, self.t_delta * step_no, self.rf_rate)
 
-    def node_value(self, step_no, no_up):
-        cache_node_key = (step_no, no_up)
-        if cache_node_key in self.cache_node:
-            return self.cache_node[cache_node_key]
-        else:
-            _spot = self.calc_spot(step_no, no_up)
-            _intrinsic_value = self.intrinsic_value(_spot)
-
-            if step_no >= self.no_of_steps:
-                return _intrinsic_value
-            else:
-                _pv = ((self.up_prob*self.node_value(step_no+1, no_up+1)) +
-                       ((1-self.up_prob)*self.node_value(step_no+1, no_up)))*self.step_discount_fact
-                _node_value = self.node_value_store(_pv,_intrinsic_value)
-                self.cache_node[cache_node_key] = _node_value
-                return self.cache_node[cache_node_key]
-
     def valuation(self):
-        return self.node_value(0, 0)
+        _up_prob = self.up_prob
+        _step_discount_fact = self.step_discount_fact
+        _is_american = self.instrument.expiry_type == ExpiryType.AMERICAN.value
+        if _binomial_backward is not None:
+            _div_processed = self.div_processed
+            _step_pv_div = np.array([pv_div(_div_processed, self.t_delta * step_no, self.rf_rate)
+                                     for step_no in range(self.no_of_steps + 1)], dtype=np.float64)
+            return _binomial_backward(self.instrument._option_type_flag, float(self.instrument.strike),
+                                      _is_american, self.spot_update, self.up_mult, _up_prob, _step_discount_fact,
+                                      _step_pv_div, self.prune_tolerance is not None,
+                                      0.0 if self.prune_tolerance is None else float(self.prune_tolerance))
+        _node_value = self.instrument.payoff(self.calc_spot(self.no_of_steps, np.arange(self.no_of_steps + 1)))
+        for step_no in range(self.no_of_steps - 1, -1, -1):
+            _node_value = ((_up_prob * _node_value[1:]) + ((1 - _up_prob) * _node_value[:-1])) * _step_discount_fact
+            if _is_american:
+                self.instrument.american_step(self.calc_spot(step_no, np.arange(step_no + 1)), _node_value,
+                                              _node_value)
+        return _node_value[0]
 
     def risk_parameters(self):
         pass
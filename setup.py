@@ -2,8 +2,13 @@
     developed by Quantsbin - Jun'18
 
 """
+import os
+import warnings
+from importlib.util import module_from_spec, spec_from_file_location
+
 import setuptools
 from distutils.core import setup
+from setuptools.command import build_ext
 
 
 # try:
@@ -18,6 +23,44 @@ try:
 except(IOError, ImportError):
     long_description = open('README.md').read()
 
+try:
+    # Loaded by path under its package name so that the extension lands in quantsbin.derivativepricing
+    # without importing the quantsbin package itself
+    _spec = spec_from_file_location('quantsbin.derivativepricing.compile_kernels',
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                 'quantsbin', 'derivativepricing', 'compile_kernels.py'))
+    _compile_kernels = module_from_spec(_spec)
+    _spec.loader.exec_module(_compile_kernels)
+    ext_modules = [_compile_kernels.cc.distutils_extension()]
+except (ImportError, RuntimeError) as err:
+    # numba missing or no C compiler available to numba.pycc
+    warnings.warn("Skipping the compiled quantsbin_kernels extension ({}), "
+                  "pure numpy implementations will be used.".format(err))
+    ext_modules = []
+
+
+class OptionalBuildExt(build_ext.build_ext):
+    """
+    Builds the compiled kernels when possible. Any compiler or build failure only skips the extension,
+    as quantsbin falls back to numpy implementations when the kernels are missing.
+    Subclasses build_ext after numba.pycc has patched it in to compile its extensions.
+    """
+
+    def run(self):
+        try:
+            build_ext.build_ext.run(self)
+        except Exception as err:
+            warnings.warn("Skipping the compiled extensions ({}), "
+                          "pure numpy implementations will be used.".format(err))
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_ext.build_extension(self, ext)
+        except Exception as err:
+            warnings.warn("Skipping the compiled {} extension ({}), "
+                          "pure numpy implementations will be used.".format(ext.name, err))
+
+
 setup(
     name='Quantsbin',
     version='1.0.2',
@@ -28,9 +71,10 @@ setup(
     author_email='contactus@quantsbin.com',
     url='https://github.com/quantsbin/Quantsbin',
     packages=['quantsbin', 'quantsbin.derivativepricing', 'quantsbin.montecarlo'],
+    ext_modules=ext_modules,
+    cmdclass={'build_ext': OptionalBuildExt},
     license='MIT',
     classifiers=[ 'Development Status :: 3 - Beta', 
-                  'Programming Language :: Python :: 3.4',
                   'Programming Language :: Python :: 3.5',
                   'Programming Language :: Python :: 3.6']
     )
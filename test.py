@@ -3,11 +3,18 @@
 
 """
 import unittest
+from unittest import mock
+import numpy as np
 import quantsbin.derivativepricing as qbdp
 import pypandoc
 
 from quantsbin.derivativepricing.namesnmapper import VanillaOptionType, ExpiryType, UdlType, OBJECT_MODEL, DerivativeType
 
+try:
+    from quantsbin.derivativepricing import quantsbin_kernels
+except ImportError:
+    quantsbin_kernels = None
+
 Input = {'equityInst': {'option_type': 'Call',
                     'expiry_type': 'European',
                     'derivative_type': 'Vanilla Option',
@@ -139,6 +146,139 @@ class Test_comOption(unittest.TestCase):
         else:
             self.fail("Invalid Model")
 
+class Test_optionBook(unittest.TestCase):
+    def setUp(self):
+        self.options = [qbdp.EqOption(option_type=option_type, strike=strike, expiry_date='20180630')
+                        for option_type in ('Call', 'Put') for strike in (90, 100, 110)]
+        self.option_book = qbdp.OptionBook.from_instruments(self.options)
+
+    def test(self):
+        spots = [95, 100, 105]
+        book_payoff = self.option_book.payoff(spots)
+        self.assertEqual(book_payoff.shape, (len(spots), len(self.options)))
+        for i, spot in enumerate(spots):
+            for j, option in enumerate(self.options):
+                self.assertAlmostEqual(book_payoff[i, j], option.payoff(spot), places=5)
+
+class Test_optionBookValuation(unittest.TestCase):
+    def setUp(self):
+        self.options = [qbdp.EqOption(option_type='Call', strike=100, expiry_date='20180630'),
+                        qbdp.EqOption(option_type='Put', strike=110, expiry_date='20180731'),
+                        qbdp.FutOption(option_type='Call', strike=105, expiry_date='20180630'),
+                        qbdp.FutOption(option_type='Put', strike=95, expiry_date='20180731'),
+                        qbdp.EqOption(option_type='Put', strike=101.3, expiry_date='20180731')]
+        self.option_book = qbdp.OptionBook.from_instruments(self.options)
+
+    def test(self):
+        premia = self.option_book.valuation(110, 0.25, '20180531', rf_rate=0.05, cnv_yield=0.01)
+        for premium, option in zip(premia, self.options):
+            if option.undl == UdlType.FUTURES.value:
+                engine = option.engine(fwd0=110, volatility=0.25, pricing_date='20180531', rf_rate=0.05)
+            else:
+                engine = option.engine(spot0=110, volatility=0.25, pricing_date='20180531', rf_rate=0.05,
+                                       yield_div=0.01)
+            self.assertAlmostEqual(premium, engine.valuation(), places=10)
+        american_book = qbdp.OptionBook.from_instruments(
+            self.options + [qbdp.EqOption(option_type='Put', strike=100, expiry_date='20180630',
+                                          expiry_type='American')])
+        with self.assertRaises(AssertionError):
+            american_book.valuation(110, 0.25, '20180531', rf_rate=0.05, cnv_yield=0.01)
+        with self.assertRaises(ValueError):
+            qbdp.OptionBook([100, 110], [1, -1], ['20180630'])
+
+
+class Test_vanillaOption(unittest.TestCase):
+    def setUp(self):
+        self.option = qbdp.instruments.VanillaOption('Put', 'European', 100, '20181231', None)
+
+    def test(self):
+        self.assertIsNone(self.option.undl)
+        self.assertEqual(self.option.payoff(90), 10)
+
+
+class Test_payoffArray(unittest.TestCase):
+    def setUp(self):
+        self.call = qbdp.EqOption(option_type='Call', strike=100, expiry_date='20180630')
+        self.put = qbdp.EqOption(option_type='Put', strike=100, expiry_date='20180630')
+        self.spots = np.array([[80.0, 100.0, 120.0], [90.0, 110.0, 130.0]])
+
+    def test(self):
+        np.testing.assert_allclose(self.call.payoff(self.spots[0]), [0.0, 0.0, 20.0])
+        np.testing.assert_allclose(self.put.payoff(self.spots[0]), [20.0, 0.0, 0.0])
+        np.testing.assert_allclose(self.call.payoff(self.spots), [[0.0, 0.0, 20.0], [0.0, 10.0, 30.0]])
+        np.testing.assert_allclose(self.put.payoff(self.spots), [[20.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+        np.testing.assert_allclose(self.call.payoff(self.spots[:, -1]), [20.0, 30.0])
+        payoff = self.put.payoff(self.spots.astype(np.float32))
+        self.assertEqual(payoff.dtype, np.float32)
+        np.testing.assert_allclose(payoff, [[20.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+
+
+class Test_americanStep(unittest.TestCase):
+    def setUp(self):
+        self.option = qbdp.EqOption(option_type='Put', strike=100, expiry_date='20180630', expiry_type='American')
+
+    def test(self):
+        spot_layer = np.array([90.0, 100.0, 110.0])
+        node_value = self.option.american_step(spot_layer, np.array([5.0, 5.0, 5.0]))
+        np.testing.assert_allclose(node_value, [10.0, 5.0, 5.0])
+        with self.assertRaises(ValueError):
+            self.option.american_step(spot_layer, np.array([5.0, 5.0]))
+        with self.assertRaises(ValueError):
+            self.option.american_step(spot_layer, np.array([5.0, 5.0, 5.0]), out=np.empty(2))
+
+
+class Test_binomial(unittest.TestCase):
+    def setUp(self):
+        self.engine_input = {'model': 'Binomial', 'spot0': 110, 'pricing_date': '20180531', 'volatility': 0.25,
+                             'rf_rate': 0.05, 'yield_div': 0.01, 'no_of_steps': 100,
+                             'div_list': [('20180610', 2), ('20180620', 1)]}
+        self.premium = {('Call', 'European'): 7.956445342517782, ('Call', 'American'): 10.134828178255216,
+                        ('Put', 'European'): 0.6287694628772715, ('Put', 'American'): 0.6326004955314931}
+
+    def test(self):
+        for (option_type, expiry_type), premium in self.premium.items():
+            option = qbdp.EqOption(option_type=option_type, expiry_type=expiry_type, strike=100,
+                                   expiry_date='20180630')
+            valuation = option.engine(**self.engine_input).valuation()
+            self.assertAlmostEqual(valuation, premium, places=10)
+            self.assertEqual(option.engine(prune_tolerance=0, **self.engine_input).valuation(), valuation)
+            with mock.patch.object(qbdp.pricingmodels, '_binomial_backward', None):
+                self.assertAlmostEqual(option.engine(**self.engine_input).valuation(), valuation, places=10)
+
+
+@unittest.skipUnless(quantsbin_kernels is not None, "quantsbin_kernels extension is not built")
+class Test_americanStepKernel(unittest.TestCase):
+    def setUp(self):
+        self.option = qbdp.EqOption(option_type='Put', strike=100, expiry_date='20180630', expiry_type='American')
+        self.spot_layer = np.array([90.0, 100.0, 110.0])
+
+    def test(self):
+        np.testing.assert_allclose(self.option.american_step(self.spot_layer, np.array([5, 5, 5])), [10.0, 5.0, 5.0])
+        out = np.empty(3, dtype=np.float32)
+        self.option.american_step(self.spot_layer, np.array([5.0, 5.0, 5.0]), out=out)
+        np.testing.assert_allclose(out, [10.0, 5.0, 5.0])
+        np.testing.assert_allclose(self.option.american_step(self.spot_layer.astype(np.float32),
+                                                             np.array([5.0, 5.0, 5.0])), [10.0, 5.0, 5.0])
+
+
+class Test_compilePricer(unittest.TestCase):
+    def setUp(self):
+        self.cases = [(qbdp.EqOption, Input['equityInst'], Input['equityEng'], {'rf_rate': 0.05, 'cnv_yield': 0.01}),
+                      (qbdp.FutOption, Input['futuresInst'], Input['futuresEng'], {'rf_rate': 0.05}),
+                      (qbdp.FXOption, Input['fxInst'], Input['fxEng'], {'rf_rate': 0.05, 'cnv_yield': 0.03}),
+                      (qbdp.ComOption, Input['comInst'], Input['comEng'],
+                       {'rf_rate': 0.05, 'cnv_yield': 0.03, 'cost_yield': 0.02})]
+
+    def test(self):
+        for option_class, inst_input, engine_input, pricer_input in self.cases:
+            for option_type in ('Call', 'Put'):
+                option = option_class(**dict(inst_input, option_type=option_type))
+                pricer = option.compile_pricer(engine_input['pricing_date'], **pricer_input)
+                spot0 = engine_input.get('spot0', engine_input.get('fwd0'))
+                self.assertAlmostEqual(pricer(spot0, engine_input['volatility']),
+                                       option.engine(**engine_input).valuation(), places=10)
+
+
 # eqOption1 = qbdp.EqOption(option_type='Call', strike=100, expiry_date='20180630')
 # models = eqOption1.list_models()
 # eqOption1_pricer = eqOption1.engine(model='BSM', spot0=100, pricing_date='20180531', volatility=.25,